@@ -1,9 +1,50 @@
 import streamlit as st
 import hashlib
+import pickle
 import time
-import json
+import zlib
+import struct
+import threading
+import uuid
+import numpy as np
 from datetime import datetime
 
+try:
+    import lz4.frame
+except ImportError:  # lz4 not installed: snapshots fall back to zlib
+    lz4 = None
+
+try:
+    import sha256_mine  # Numba-compiled mining kernel
+except ImportError:  # numba not installed: mine with hashlib instead
+    sha256_mine = None
+
+try:
+    import native_mine  # C kernel from mine_range.c
+except OSError:  # libmine_range.so has not been built
+    native_mine = None
+
+try:
+    import cuda_mine  # CUDA kernel from mine.cu
+except ImportError:  # no CuPy or no CUDA device
+    cuda_mine = None
+
+
+def select_hash_backend():
+    """Picks the mining backend.
+
+    The native kernel keeps the whole nonce search out of the interpreter, so
+    it wins whenever it has been built. Otherwise the Numba kernel is used
+    whenever it imports: it hashes on every core, while the hashlib loop
+    pays interpreter overhead per nonce even when OpenSSL has SHA
+    instructions to work with.
+    """
+    if native_mine is not None:
+        return "native"
+    if sha256_mine is not None:
+        return "numba"
+    return "hashlib"
+
 # ==========================================
 # 1. CORE BLOCKCHAIN CLASSES
 # ==========================================
@@ -12,14 +53,20 @@ class Transaction:
     def __init__(self, sender, receiver, amount, timestamp=None, tx_id=None):
         self.sender = sender
         self.receiver = receiver
-        self.amount = amount
-        self.timestamp = timestamp if timestamp else time.time()
+        # Both numeric fields are fixed-width integers: whole coins and
+        # microseconds since the epoch
+        self.amount = int(amount)
+        self.timestamp_us = int((timestamp if timestamp else time.time()) * 1_000_000)
+        self._sender_b = sender.encode()
+        self._receiver_b = receiver.encode()
         self.id = tx_id if tx_id else self.calculate_hash()
 
     def calculate_hash(self):
         """Generates a unique hash for the transaction data."""
-        tx_string = f"{self.sender}{self.receiver}{self.amount}{self.timestamp}"
-        return hashlib.sha256(tx_string.encode()).hexdigest()
+        # Fixed binary layout: no string formatting of the numeric fields
+        return hashlib.sha256(b"".join([
+            self._sender_b, b"|", self._receiver_b, b"|", struct.pack("<Qq", self.timestamp_us, self.amount)
+        ])).hexdigest()
 
     def to_dict(self):
         return {
@@ -27,10 +74,80 @@ class Transaction:
             "sender": self.sender,
             "receiver": self.receiver,
             "amount": self.amount,
-            "timestamp": self.timestamp
+            # Stored as integer microseconds; shown as seconds
+            "timestamp": self.timestamp_us / 1_000_000
         }
 
+class BlockTxTable:
+    """A block's transactions stored column by column (struct of arrays).
+
+    Numeric fields live in contiguous numpy arrays so block-wide work
+    (serializing, hashing, display) walks each column once instead of
+    visiting every Transaction object.
+    """
+
+    def __init__(self, transactions):
+        self.ids = np.array([tx.id for tx in transactions], dtype=object)
+        self.senders = np.array([tx.sender for tx in transactions], dtype=object)
+        self.receivers = np.array([tx.receiver for tx in transactions], dtype=object)
+        self.amounts = np.array([tx.amount for tx in transactions], dtype=np.int64)
+        self.timestamps_us = np.array([tx.timestamp_us for tx in transactions], dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def columns(self):
+        return {
+            "ids": self.ids,
+            "senders": self.senders,
+            "receivers": self.receivers,
+            "amounts": self.amounts,
+            "timestamps_us": self.timestamps_us,
+        }
+
+    @staticmethod
+    def to_transactions(columns):
+        """Rebuilds Transaction objects from the arrays returned by columns()."""
+        transactions = []
+        for tx_id, sender, receiver, amount, timestamp_us in zip(
+            columns["ids"], columns["senders"], columns["receivers"],
+            columns["amounts"].tolist(), columns["timestamps_us"].tolist()
+        ):
+            tx = Transaction(sender, receiver, amount, tx_id=tx_id)
+            tx.timestamp_us = timestamp_us
+            transactions.append(tx)
+        return transactions
+
+    def to_dict_list(self):
+        # Timestamps are kept as integer microseconds and shown as seconds
+        return [
+            {"id": tx_id, "sender": sender, "receiver": receiver, "amount": amount, "timestamp": timestamp_us / 1_000_000}
+            for tx_id, sender, receiver, amount, timestamp_us in zip(
+                self.ids, self.senders, self.receivers, self.amounts.tolist(), self.timestamps_us.tolist()
+            )
+        ]
+
+    def to_bytes(self):
+        """Serializes the table for hashing.
+
+        Layout: row count, the byte length of every id/sender/receiver string,
+        the strings themselves, then the raw little-endian amount and
+        timestamp columns.
+        """
+        strings = [s.encode() for column in (self.ids, self.senders, self.receivers) for s in column]
+        header = struct.pack(f"<I{len(strings)}I", len(self), *map(len, strings))
+        return b"".join([
+            header,
+            *strings,
+            self.amounts.astype("<i8").tobytes(),
+            self.timestamps_us.astype("<u8").tobytes(),
+        ])
+
 class Block:
+    _hash_backend = select_hash_backend()
+    # Below this the GPU launch and kernel compile cost more than the search
+    _cuda_min_difficulty = 6
+
     def __init__(self, index, previous_hash, transactions, difficulty):
         self.index = index
         self.timestamp = time.time()
@@ -38,33 +155,100 @@ class Block:
         self.previous_hash = previous_hash
         self.difficulty = difficulty
         self.nonce = 0
+        self._cache_transactions()
         self.hash = self.calculate_hash()
         self.mining_time = 0
 
+    def to_record(self):
+        """Plain data for snapshots: block fields plus the transaction columns."""
+        return {
+            "index": self.index,
+            "timestamp": self.timestamp,
+            "previous_hash": self.previous_hash,
+            "difficulty": self.difficulty,
+            "nonce": self.nonce,
+            "hash": self.hash,
+            "mining_time": self.mining_time,
+            "transactions": self.tx_table.columns(),
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        """Restores a block from to_record() output, keeping its stored hash."""
+        block = cls.__new__(cls)
+        block.index = record["index"]
+        block.timestamp = record["timestamp"]
+        block.transactions = BlockTxTable.to_transactions(record["transactions"])
+        block.previous_hash = record["previous_hash"]
+        block.difficulty = record["difficulty"]
+        block.nonce = record["nonce"]
+        block._cache_transactions()
+        block.hash = record["hash"]
+        block.mining_time = record["mining_time"]
+        return block
+
+    def _cache_transactions(self):
+        """Serializes the transactions once and hashes the fixed block prefix.
+
+        Everything except the nonce stays fixed while mining, so the SHA-256
+        state over that prefix (the "midstate") is computed only once.
+        """
+        self.tx_table = BlockTxTable(self.transactions)
+        self._tx_bytes = self.tx_table.to_bytes()
+        # Assembled in one preallocated buffer and handed out as a memoryview,
+        # so neither hashlib nor the mining backends copy the prefix again
+        head = f"{self.index}{self.timestamp}".encode()
+        tail = f"{self.previous_hash}{self.difficulty}".encode()
+        self._prefix_buf = bytearray(len(head) + len(self._tx_bytes) + len(tail))
+        self._prefix_buf[:len(head)] = head
+        self._prefix_buf[len(head):len(head) + len(self._tx_bytes)] = self._tx_bytes
+        self._prefix_buf[len(head) + len(self._tx_bytes):] = tail
+        self._prefix_mv = memoryview(self._prefix_buf)
+        self._prefix_hasher = hashlib.sha256()
+        self._prefix_hasher.update(self._prefix_mv)
+
     def calculate_hash(self):
         """Calculates the hash of the block contents."""
-        # We sort transactions to ensure consistent hashing
-        tx_string = json.dumps([tx.to_dict() for tx in self.transactions], sort_keys=True)
-        block_string = f"{self.index}{self.timestamp}{tx_string}{self.previous_hash}{self.difficulty}{self.nonce}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        hasher = self._prefix_hasher.copy()
+        hasher.update(self.nonce.to_bytes(8, "little"))
+        return hasher.hexdigest()
+
+    def tamper_transaction(self, tx_index, amount):
+        """Overwrites a transaction amount in place, leaving the stored hash stale."""
+        tx = self.transactions[tx_index]
+        tx.amount = int(amount)
+        self._cache_transactions()
 
     def mine_block(self):
         """Performs Proof of Work."""
-        target = "0" * self.difficulty
         start_time = time.time()
         
         # UI placeholder for mining progress
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        while self.hash[:self.difficulty] != target:
-            self.nonce += 1
-            self.hash = self.calculate_hash()
-            
-            # Update UI every 500 attempts to prevent slowing down too much
-            if self.nonce % 500 == 0:
-                status_text.text(f"Mining... Nonce: {self.nonce} | Hash: {self.hash}")
+        # Mine in a background thread; this thread only redraws the progress
+        # text (~30 times a second) so UI calls never slow down the search.
+        self._nonce_counter = self.nonce
+        self._mined = threading.Event()
+        self._stop_mining = threading.Event()
+        self._mine_result = None
+        miner = threading.Thread(target=self._mine_loop, daemon=True)
+        miner.start()
+        try:
+            while not self._mined.wait(0.033):
+                status_text.text(f"Mining... Nonce: {self._nonce_counter}")
+        finally:
+            # A Streamlit rerun or stop interrupts the loop above; tell the
+            # miner to give up so it does not keep hashing in the background
+            self._stop_mining.set()
+            miner.join()
         
+        if isinstance(self._mine_result, BaseException):
+            raise self._mine_result
+        nonce, digest = self._mine_result
+        self.nonce = nonce
+        self.hash = digest.hex()
         end_time = time.time()
         self.mining_time = end_time - start_time
         
@@ -72,13 +256,185 @@ class Block:
         progress_bar.empty()
         return True
 
+    def _mine_loop(self):
+        """Runs the nonce search on the selected backend (miner thread).
+
+        Every backend checks _stop_mining between chunks of work and returns
+        None once it is set.
+        """
+        try:
+            if cuda_mine is not None and self.difficulty >= self._cuda_min_difficulty:
+                self._mine_result = self._mine_cuda()
+            elif self._hash_backend == "native":
+                self._mine_result = self._mine_native()
+            elif self._hash_backend == "numba":
+                self._mine_result = self._mine_compiled()
+            else:
+                self._mine_result = self._mine_hashlib()
+        except Exception as e:
+            self._mine_result = e
+        finally:
+            self._mined.set()
+
+    def _mine_hashlib(self):
+        """Nonce search in Python, resuming hashlib from the cached midstate."""
+        # Compare raw digest bytes instead of hex strings: N leading hex zeros
+        # means N // 2 zero bytes, plus a byte below 0x10 when N is odd.
+        zero_bytes, half_byte = divmod(self.difficulty, 2)
+        zero_prefix = bytes(zero_bytes)
+        
+        # The nonce is hashed as 8 little-endian bytes, packed into one reused buffer
+        nonce_buf = bytearray(8)
+        nonce = self.nonce
+        digest = bytes.fromhex(self.hash)
+        while not digest.startswith(zero_prefix) or (half_byte and digest[zero_bytes] >= 0x10):
+            nonce += 1
+            if not nonce & 0xFFFF and self._stop_mining.is_set():
+                return None
+            struct.pack_into("<Q", nonce_buf, 0, nonce)
+            # Resume from the cached midstate and only hash the nonce
+            hasher = self._prefix_hasher.copy()
+            hasher.update(nonce_buf)
+            digest = hasher.digest()
+            self._nonce_counter = nonce
+        return nonce, digest
+
+    def _mine_native(self):
+        """Nonce search in the C kernel, one native call per chunk of nonces."""
+        midstate, tail, offset = native_mine.prefix_midstate(self._prefix_mv)
+        chunk = 1_000_000
+        start = self.nonce
+        while not self._stop_mining.is_set():
+            nonce, digest = native_mine.mine_range(midstate, tail, offset, self.difficulty, start, start + chunk)
+            if nonce >= 0:
+                return nonce, digest
+            start += chunk
+            self._nonce_counter = start
+
+    def _mine_cuda(self):
+        """Nonce search on the GPU, one kernel launch per batch of nonces."""
+        midstate, tail, offset = cuda_mine.prefix_midstate(self._prefix_mv)
+        start = self.nonce
+        while not self._stop_mining.is_set():
+            nonce = cuda_mine.mine_batch(midstate, tail, offset, self.difficulty, start)
+            if nonce >= 0:
+                hasher = self._prefix_hasher.copy()
+                hasher.update(nonce.to_bytes(8, "little"))
+                return nonce, hasher.digest()
+            start += cuda_mine.BATCH_SIZE
+            self._nonce_counter = start
+
+    def _mine_compiled(self):
+        """Nonce search in the Numba kernel, hashing a batch of nonces per call."""
+        midstate, tail, offset = sha256_mine.prefix_midstate(self._prefix_mv)
+        # Per-byte upper bounds for the digest prefix: zero bytes, plus 0x0F
+        # for the byte holding the last zero nibble when the difficulty is odd.
+        zero_bytes, half_byte = divmod(self.difficulty, 2)
+        target_bytes = np.zeros(zero_bytes + half_byte, dtype=np.uint8)
+        if half_byte:
+            target_bytes[-1] = 0x0F
+        batch_size = 4096
+        
+        nonce = self.nonce
+        while not self._stop_mining.is_set():
+            digests = sha256_mine.hash_batch(midstate, tail, offset, nonce, batch_size)
+            # Test the whole batch at once and take the first winning row
+            hits = np.all(digests[:, :len(target_bytes)] <= target_bytes, axis=1)
+            row = int(np.argmax(hits))
+            if hits[row]:
+                return nonce + row, digests[row].tobytes()
+            nonce += batch_size
+            self._nonce_counter = nonce
+
+class ShardedIdSet:
+    """Set of transaction IDs split into 256 shards.
+
+    The shard is picked from the string's own hash, which CPython caches on
+    the object, so routing adds almost nothing to a lookup. Every shard has
+    its own lock; add_if_absent checks and inserts as one locked step so two
+    threads cannot both accept the same ID.
+    """
+
+    def __init__(self):
+        self._shards = [set() for _ in range(256)]
+        self._locks = [threading.Lock() for _ in range(256)]
+
+    def __contains__(self, tx_id):
+        return tx_id in self._shards[hash(tx_id) & 0xFF]
+
+    def add(self, tx_id):
+        self.add_if_absent(tx_id)
+
+    def add_if_absent(self, tx_id):
+        """Adds tx_id and returns True, or returns False if it was already present."""
+        shard = hash(tx_id) & 0xFF
+        with self._locks[shard]:
+            if tx_id in self._shards[shard]:
+                return False
+            self._shards[shard].add(tx_id)
+            return True
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def __iter__(self):
+        for shard in self._shards:
+            yield from shard
+
 class Blockchain:
     def __init__(self):
         self.chain = [self.create_genesis_block()]
         self.pending_transactions = []
+        self.pending_tx_ids = set()  # IDs in pending_transactions, for O(1) duplicate checks
         self.difficulty = 2  # Starting difficulty
-        self.processed_tx_ids = set() 
+        self.processed_tx_ids = ShardedIdSet()
         self.mining_times = []
+        # is_chain_valid() result, reused until the chain changes. Blocks
+        # below _validated_len already passed validation and are not rehashed.
+        self._valid_cache = None
+        self._chain_dirty = True
+        self._validated_len = 1
+        # Bumped on every mutation so UI caches can key on it cheaply; the
+        # instance id keeps keys of different Blockchain objects apart
+        self._dirty_tag = 0
+        self._instance_id = uuid.uuid4().hex
+
+    def snapshot(self):
+        """Serializes the chain to a compressed blob (see from_snapshot)."""
+        state = {
+            "chain": [block.to_record() for block in self.chain],
+            "pending": BlockTxTable(self.pending_transactions).columns(),
+            "processed_tx_ids": list(self.processed_tx_ids),
+            "difficulty": self.difficulty,
+            "mining_times": self.mining_times,
+            "dirty_tag": self._dirty_tag,
+        }
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        # The first byte records the codec so either kind of blob can be restored
+        if lz4 is not None:
+            return b"L" + lz4.frame.compress(data, compression_level=0)
+        return b"Z" + zlib.compress(data, 1)
+
+    @classmethod
+    def from_snapshot(cls, blob):
+        """Rebuilds a Blockchain from snapshot() output."""
+        if blob[:1] == b"L":
+            data = lz4.frame.decompress(blob[1:])
+        else:
+            data = zlib.decompress(blob[1:])
+        state = pickle.loads(data)
+
+        bc = cls()
+        bc.chain = [Block.from_record(record) for record in state["chain"]]
+        for tx in BlockTxTable.to_transactions(state["pending"]):
+            bc.pending_transactions.append(tx)
+            bc.pending_tx_ids.add(tx.id)
+        for tx_id in state["processed_tx_ids"]:
+            bc.processed_tx_ids.add(tx_id)
+        bc.difficulty = state["difficulty"]
+        bc.mining_times = state["mining_times"]
+        bc._dirty_tag = state["dirty_tag"]
+        return bc
 
     def create_genesis_block(self):
         """Creates the first block in the chain."""
@@ -92,14 +448,17 @@ class Blockchain:
         if secure_mode:
             if transaction.id in self.processed_tx_ids:
                 return False, "❌ REPLAY ATTACK BLOCKED: Transaction ID already exists!"
-            
-            for tx in self.pending_transactions:
-                if tx.id == transaction.id:
-                    return False, "❌ REPLAY ATTACK BLOCKED: Transaction already pending!"
+
+            if transaction.id in self.pending_tx_ids:
+                return False, "❌ REPLAY ATTACK BLOCKED: Transaction already pending!"
+
+            # Check and record the ID in one locked step, last, so a rejected
+            # transaction leaves nothing behind
+            if not self.processed_tx_ids.add_if_absent(transaction.id):
+                return False, "❌ REPLAY ATTACK BLOCKED: Transaction ID already exists!"
 
         self.pending_transactions.append(transaction)
-        if secure_mode:
-             self.processed_tx_ids.add(transaction.id)
+        self.pending_tx_ids.add(transaction.id)
              
         return True, "✅ Transaction added successfully!"
 
@@ -131,11 +490,14 @@ class Blockchain:
 
         new_block.mine_block()
         self.chain.append(new_block)
+        self._chain_dirty = True
+        self._dirty_tag += 1
         
         for tx in self.pending_transactions:
             self.processed_tx_ids.add(tx.id)
 
         self.pending_transactions = []
+        self.pending_tx_ids.clear()
         self.mining_times.append(new_block.mining_time)
 
         if auto_adjust:
@@ -144,22 +506,37 @@ class Blockchain:
         return True, f"Block #{new_block.index} mined successfully in {new_block.mining_time:.4f}s!"
 
     def is_chain_valid(self):
-        for i in range(1, len(self.chain)):
+        if not self._chain_dirty:
+            return self._valid_cache
+
+        self._valid_cache = self._validate_from(self._validated_len)
+        self._chain_dirty = False
+        return self._valid_cache
+
+    def _validate_from(self, start):
+        """Checks blocks from start onwards; the ones before it are known to be valid."""
+        for i in range(max(start, 1), len(self.chain)):
             current = self.chain[i]
             previous = self.chain[i - 1]
 
             if current.hash != current.calculate_hash():
+                self._validated_len = i
                 return False, f"Block {i} hash mismatch! Data tampered?"
             
             if current.previous_hash != previous.hash:
+                self._validated_len = i
                 return False, f"Block {i} invalid previous hash link!"
 
+        self._validated_len = len(self.chain)
         return True, "Blockchain is valid."
 
     def corrupt_block(self, block_index, new_data):
         if block_index < len(self.chain):
             if self.chain[block_index].transactions:
-                self.chain[block_index].transactions[0].amount = new_data
+                self.chain[block_index].tamper_transaction(0, new_data)
+                self._validated_len = min(self._validated_len, block_index)
+                self._chain_dirty = True
+                self._dirty_tag += 1
             else:
                 return False, "Block has no transactions to tamper."
             return True, "Block tampered."
@@ -180,6 +557,14 @@ if 'wallet_bob' not in st.session_state:
 
 bc = st.session_state.blockchain
 
+@st.cache_data(max_entries=8, show_spinner=False)
+def validate_chain(_bc, instance_id, chain_len, tip_hash, dirty_tag):
+    """Chain validation keyed on (instance, length, tip hash, mutation count) instead of the whole chain."""
+    return _bc.is_chain_valid()
+
+def chain_status(bc):
+    return validate_chain(bc, bc._instance_id, len(bc.chain), bc.chain[-1].hash, bc._dirty_tag)
+
 st.title("🔗 EduChain: Advanced Blockchain Simulator")
 st.markdown("### A Practical Demonstration of Blockchain Mechanics")
 
@@ -187,7 +572,8 @@ col1, col2, col3, col4 = st.columns(4)
 col1.metric("Blocks Mined", len(bc.chain))
 col2.metric("Pending Tx", len(bc.pending_transactions))
 col3.metric("Current Difficulty", bc.difficulty)
-col4.metric("Chain Status", "Valid" if bc.is_chain_valid()[0] else "INVALID", delta_color="normal" if bc.is_chain_valid()[0] else "inverse")
+chain_valid, _ = chain_status(bc)
+col4.metric("Chain Status", "Valid" if chain_valid else "INVALID", delta_color="normal" if chain_valid else "inverse")
 
 # ==========================================
 # 3. SIDEBAR CONTROLS
@@ -219,6 +605,15 @@ with st.sidebar:
         else:
             st.toast(msg, icon="⚠️")
 
+    if st.button("💾 Save Snapshot"):
+        st.session_state.snapshot = (bc.snapshot(), st.session_state.wallet_alice, st.session_state.wallet_bob)
+        st.toast(f"Snapshot saved ({len(st.session_state.snapshot[0]):,} bytes).", icon="💾")
+
+    if 'snapshot' in st.session_state and st.button("♻️ Restore Snapshot"):
+        blob, st.session_state.wallet_alice, st.session_state.wallet_bob = st.session_state.snapshot
+        st.session_state.blockchain = Blockchain.from_snapshot(blob)
+        st.rerun()
+
     if st.button("🧹 Reset Blockchain"):
         st.session_state.blockchain = Blockchain()
         st.session_state.wallet_alice = 100
@@ -299,7 +694,7 @@ with tab1:
 with tab2:
     st.subheader("🔍 Chain Explorer")
     
-    is_valid, valid_msg = bc.is_chain_valid()
+    is_valid, valid_msg = chain_status(bc)
     if is_valid:
         st.success(f"✅ {valid_msg}")
     else:
@@ -323,7 +718,7 @@ with tab2:
             st.write("---")
             st.write("**Transactions:**")
             if block.transactions:
-                st.json([tx.to_dict() for tx in block.transactions])
+                st.json(block.tx_table.to_dict_list())
             else:
                 st.write("System Block (No user transactions)")
 
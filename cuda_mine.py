@@ -0,0 +1,84 @@
+"""CUDA mining backend: the kernels in mine.cu, compiled at import with CuPy.
+
+Importing this module raises ImportError when CuPy is not installed, no
+CUDA device is present or the kernels fail to compile or load.
+
+Run this file directly to check mine_batch against hashlib on the local GPU.
+"""
+
+import hashlib
+import os
+
+import cupy as cp
+import numpy as np
+
+try:
+    _has_device = cp.cuda.runtime.getDeviceCount() > 0
+except cp.cuda.runtime.CUDARuntimeError:
+    _has_device = False
+if not _has_device:
+    raise ImportError("no CUDA device available")
+
+try:
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "mine.cu")) as f:
+        _module = cp.RawModule(code=f.read())
+    # RawModule compiles lazily: NVRTC and driver errors surface here
+    _midstate_kernel = _module.get_function("sha256_midstate")
+    _mine_kernel = _module.get_function("mine_kernel")
+except Exception as e:
+    raise ImportError(f"CUDA kernels unavailable: {e}") from e
+
+GRID_SIZE = 65536
+BLOCK_SIZE = 256
+BATCH_SIZE = GRID_SIZE * BLOCK_SIZE  # nonces hashed per launch
+_NO_WINNER = np.uint64(2**64 - 1)
+
+
+def prefix_midstate(prefix):
+    """Compresses every full 64-byte block of prefix on the GPU.
+
+    Returns (midstate, tail, offset) as device arrays plus the number of
+    bytes already consumed, like sha256_mine.prefix_midstate.
+    """
+    offset = len(prefix) - len(prefix) % 64
+    data = cp.asarray(np.frombuffer(prefix[:offset], dtype=np.uint8))
+    midstate = cp.empty(8, dtype=cp.uint32)
+    _midstate_kernel((1,), (1,), (data, np.uint64(offset // 64), midstate))
+    tail = cp.asarray(np.frombuffer(prefix[offset:], dtype=np.uint8))
+    return midstate, tail, offset
+
+
+def mine_batch(midstate, tail, offset, difficulty, base):
+    """Hashes the BATCH_SIZE nonces starting at base in one launch.
+
+    Returns the lowest winning nonce, or -1 when the batch has none.
+    """
+    winner = cp.full(1, _NO_WINNER, dtype=cp.uint64)
+    _mine_kernel(
+        (GRID_SIZE,), (BLOCK_SIZE,),
+        (midstate, tail, np.int32(len(tail)), np.uint64(offset), np.int32(difficulty), np.uint64(base), winner),
+    )
+    nonce = winner.get()[0]
+    return -1 if nonce == _NO_WINNER else int(nonce)
+
+
+def _leading_hex_zeros(digest):
+    hex_digest = digest.hex()
+    return len(hex_digest) - len(hex_digest.lstrip("0"))
+
+
+if __name__ == "__main__":
+    # Prefix lengths chosen so the tail plus nonce spans one and two blocks
+    difficulty = 4
+    for prefix_len in (0, 40, 55, 63, 64, 100, 250):
+        prefix = bytes(range(256))[:prefix_len]
+        midstate, tail, offset = prefix_midstate(prefix)
+        nonce = mine_batch(midstate, tail, offset, difficulty, 0)
+        # hashlib reference: the first nonce with enough leading hex zeros
+        expected = 0
+        while _leading_hex_zeros(hashlib.sha256(prefix + expected.to_bytes(8, "little")).digest()) < difficulty:
+            expected += 1
+        status = "ok" if nonce == expected else "MISMATCH"
+        print(f"prefix {prefix_len:3d} bytes: gpu nonce {nonce}, hashlib nonce {expected} {status}")
+        if nonce != expected:
+            raise SystemExit(1)
@@ -0,0 +1,98 @@
+/*
+ * CUDA proof-of-work kernels, compiled at runtime by cuda_mine.py.
+ *
+ * Every thread hashes one nonce: it rebuilds the final message blocks
+ * (tail + 8-byte little-endian nonce + padding), runs the SHA-256
+ * compression from the shared midstate and, on a hit, records its nonce
+ * with atomicMin so the lowest winning nonce of the launch is kept.
+ */
+
+__constant__ unsigned int K[64] = {
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+};
+
+__device__ __forceinline__ unsigned int rotr(unsigned int x, int n)
+{
+    return __funnelshift_r(x, x, n);
+}
+
+__device__ void compress(unsigned int state[8], const unsigned char *block)
+{
+    unsigned int w[64];
+
+    for (int t = 0; t < 16; t++)
+        w[t] = (unsigned int)block[4 * t] << 24 | (unsigned int)block[4 * t + 1] << 16 |
+               (unsigned int)block[4 * t + 2] << 8 | (unsigned int)block[4 * t + 3];
+    for (int t = 16; t < 64; t++) {
+        unsigned int s0 = rotr(w[t - 15], 7) ^ rotr(w[t - 15], 18) ^ (w[t - 15] >> 3);
+        unsigned int s1 = rotr(w[t - 2], 17) ^ rotr(w[t - 2], 19) ^ (w[t - 2] >> 10);
+        w[t] = w[t - 16] + s0 + w[t - 7] + s1;
+    }
+
+    unsigned int a = state[0], b = state[1], c = state[2], d = state[3];
+    unsigned int e = state[4], f = state[5], g = state[6], h = state[7];
+    for (int t = 0; t < 64; t++) {
+        unsigned int t1 = h + (rotr(e, 6) ^ rotr(e, 11) ^ rotr(e, 25)) + ((e & f) ^ (~e & g)) + K[t] + w[t];
+        unsigned int t2 = (rotr(a, 2) ^ rotr(a, 13) ^ rotr(a, 22)) + ((a & b) ^ (a & c) ^ (b & c));
+        h = g; g = f; f = e; e = d + t1;
+        d = c; c = b; b = a; a = t1 + t2;
+    }
+
+    state[0] += a; state[1] += b; state[2] += c; state[3] += d;
+    state[4] += e; state[5] += f; state[6] += g; state[7] += h;
+}
+
+/* SHA-256 state after nblocks full 64-byte blocks of data (single thread). */
+extern "C" __global__ void sha256_midstate(const unsigned char *data, unsigned long long nblocks, unsigned int *out)
+{
+    unsigned int state[8] = {
+        0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+    };
+    for (unsigned long long i = 0; i < nblocks; i++)
+        compress(state, data + 64 * i);
+    for (int i = 0; i < 8; i++)
+        out[i] = state[i];
+}
+
+extern "C" __global__ void mine_kernel(const unsigned int *H0, const unsigned char *tail, int tail_len,
+                                       unsigned long long offset, int diff, unsigned long long base,
+                                       unsigned long long *winner)
+{
+    unsigned long long nonce = base + (unsigned long long)blockIdx.x * blockDim.x + threadIdx.x;
+
+    /* Tail < 64 bytes, + 8 nonce bytes + padding: at most two blocks */
+    unsigned char buf[128];
+    int msg_len = tail_len + 8;
+    int end = 64 * ((msg_len + 9 + 63) / 64);
+    unsigned long long bit_len = (offset + msg_len) * 8;
+
+    for (int i = 0; i < end; i++)
+        buf[i] = 0;
+    for (int i = 0; i < tail_len; i++)
+        buf[i] = tail[i];
+    for (int i = 0; i < 8; i++)
+        buf[tail_len + i] = (unsigned char)(nonce >> (8 * i));
+    buf[msg_len] = 0x80;
+    for (int i = 0; i < 8; i++)
+        buf[end - 1 - i] = (unsigned char)(bit_len >> (8 * i));
+
+    unsigned int state[8];
+    for (int i = 0; i < 8; i++)
+        state[i] = H0[i];
+    for (int i = 0; i < end; i += 64)
+        compress(state, buf + i);
+
+    /* Leading hex zeros are the high nibbles of the big-endian state words */
+    for (int i = 0; i < diff; i++) {
+        if ((state[i / 8] >> (28 - 4 * (i % 8))) & 0xF)
+            return;
+    }
+    atomicMin(winner, nonce);
+}
@@ -0,0 +1,180 @@
+/*
+ * Native proof-of-work kernel: midstate copy, nonce update, SHA-256
+ * compression and the leading-zero test fused into one loop, so a whole
+ * range of nonces is searched per call from Python.
+ *
+ * Build (see native_mine.py):
+ *     cc -O3 -march=native -shared -fPIC -o libmine_range.so mine_range.c
+ *
+ * With -march=native on a CPU with SHA extensions (or with -msha) the
+ * compression uses the SHA-NI instructions; otherwise a portable C
+ * implementation is compiled.
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+#if defined(__SHA__) && defined(__SSE4_1__)
+#include <immintrin.h>
+#define USE_SHA_NI 1
+#endif
+
+static const uint32_t K[64] = {
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+};
+
+static const uint32_t H_INIT[8] = {
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+};
+
+#ifdef USE_SHA_NI
+
+/* Two rounds per sha256rnds2 instruction; the state is kept as ABEF/CDGH. */
+static void compress(uint32_t state[8], const uint8_t *data, size_t nblocks)
+{
+    const __m128i bswap = _mm_set_epi64x(0x0c0d0e0f08090a0bULL, 0x0405060700010203ULL);
+    __m128i tmp = _mm_loadu_si128((const __m128i *)&state[0]);
+    __m128i state1 = _mm_loadu_si128((const __m128i *)&state[4]);
+    tmp = _mm_shuffle_epi32(tmp, 0xB1);            /* CDAB */
+    state1 = _mm_shuffle_epi32(state1, 0x1B);      /* EFGH */
+    __m128i state0 = _mm_alignr_epi8(tmp, state1, 8); /* ABEF */
+    state1 = _mm_blend_epi16(state1, tmp, 0xF0);   /* CDGH */
+
+    for (; nblocks; nblocks--, data += 64) {
+        __m128i abef_save = state0;
+        __m128i cdgh_save = state1;
+        __m128i msgs[4];
+
+        for (int g = 0; g < 16; g++) {
+            __m128i msg;
+            if (g < 4) {
+                msg = _mm_shuffle_epi8(_mm_loadu_si128((const __m128i *)(data + 16 * g)), bswap);
+            } else {
+                /* W[t] = s1(W[t-2]) + W[t-7] + s0(W[t-15]) + W[t-16], four lanes at a time */
+                msg = _mm_sha256msg1_epu32(msgs[g & 3], msgs[(g + 1) & 3]);
+                msg = _mm_add_epi32(msg, _mm_alignr_epi8(msgs[(g + 3) & 3], msgs[(g + 2) & 3], 4));
+                msg = _mm_sha256msg2_epu32(msg, msgs[(g + 3) & 3]);
+            }
+            msgs[g & 3] = msg;
+
+            __m128i wk = _mm_add_epi32(msg, _mm_loadu_si128((const __m128i *)&K[4 * g]));
+            state1 = _mm_sha256rnds2_epu32(state1, state0, wk);
+            wk = _mm_shuffle_epi32(wk, 0x0E);
+            state0 = _mm_sha256rnds2_epu32(state0, state1, wk);
+        }
+
+        state0 = _mm_add_epi32(state0, abef_save);
+        state1 = _mm_add_epi32(state1, cdgh_save);
+    }
+
+    tmp = _mm_shuffle_epi32(state0, 0x1B);         /* FEBA */
+    state1 = _mm_shuffle_epi32(state1, 0xB1);      /* DCHG */
+    state0 = _mm_blend_epi16(tmp, state1, 0xF0);   /* DCBA */
+    state1 = _mm_alignr_epi8(state1, tmp, 8);      /* HGFE */
+    _mm_storeu_si128((__m128i *)&state[0], state0);
+    _mm_storeu_si128((__m128i *)&state[4], state1);
+}
+
+#else
+
+#define ROTR(x, n) (((x) >> (n)) | ((x) << (32 - (n))))
+
+static void compress(uint32_t state[8], const uint8_t *data, size_t nblocks)
+{
+    uint32_t w[64];
+
+    for (; nblocks; nblocks--, data += 64) {
+        for (int t = 0; t < 16; t++)
+            w[t] = (uint32_t)data[4 * t] << 24 | (uint32_t)data[4 * t + 1] << 16 |
+                   (uint32_t)data[4 * t + 2] << 8 | (uint32_t)data[4 * t + 3];
+        for (int t = 16; t < 64; t++) {
+            uint32_t s0 = ROTR(w[t - 15], 7) ^ ROTR(w[t - 15], 18) ^ (w[t - 15] >> 3);
+            uint32_t s1 = ROTR(w[t - 2], 17) ^ ROTR(w[t - 2], 19) ^ (w[t - 2] >> 10);
+            w[t] = w[t - 16] + s0 + w[t - 7] + s1;
+        }
+
+        uint32_t a = state[0], b = state[1], c = state[2], d = state[3];
+        uint32_t e = state[4], f = state[5], g = state[6], h = state[7];
+        for (int t = 0; t < 64; t++) {
+            uint32_t t1 = h + (ROTR(e, 6) ^ ROTR(e, 11) ^ ROTR(e, 25)) + ((e & f) ^ (~e & g)) + K[t] + w[t];
+            uint32_t t2 = (ROTR(a, 2) ^ ROTR(a, 13) ^ ROTR(a, 22)) + ((a & b) ^ (a & c) ^ (b & c));
+            h = g; g = f; f = e; e = d + t1;
+            d = c; c = b; b = a; a = t1 + t2;
+        }
+
+        state[0] += a; state[1] += b; state[2] += c; state[3] += d;
+        state[4] += e; state[5] += f; state[6] += g; state[7] += h;
+    }
+}
+
+#endif
+
+/* SHA-256 state after every full 64-byte block of data; the rest is the tail. */
+void sha256_midstate(const uint8_t *data, size_t len, uint32_t out[8])
+{
+    memcpy(out, H_INIT, sizeof(H_INIT));
+    compress(out, data, len / 64);
+}
+
+/*
+ * Searches nonces in [n0, n1) for a hash with `difficulty` leading hex zeros.
+ * The message is the prefix already folded into H0 (offset bytes), then tail,
+ * then the nonce as 8 little-endian bytes. Returns the first winning nonce and
+ * writes its digest to out_digest, or returns -1 when the range has none.
+ */
+int64_t mine_range(const uint32_t H0[8], const uint8_t *tail, size_t tail_len, uint64_t offset,
+                   int difficulty, int64_t n0, int64_t n1, uint8_t out_digest[32])
+{
+    /* Tail < 64 bytes, + 8 nonce bytes + padding: at most two blocks */
+    uint8_t buf[128];
+    uint32_t state[8];
+    size_t msg_len = tail_len + 8;
+    size_t nblocks = (msg_len + 9 + 63) / 64;
+    uint8_t *end = buf + 64 * nblocks;
+    uint64_t bit_len = (offset + msg_len) * 8;
+
+    if (tail_len >= 64)
+        return -1;
+
+    /* Padding is the same for every nonce: only the nonce slot changes */
+    memset(buf, 0, sizeof(buf));
+    memcpy(buf, tail, tail_len);
+    buf[msg_len] = 0x80;
+    for (int i = 0; i < 8; i++)
+        end[-1 - i] = (uint8_t)(bit_len >> (8 * i));
+
+    for (int64_t nonce = n0; nonce < n1; nonce++) {
+        for (int i = 0; i < 8; i++)
+            buf[tail_len + i] = (uint8_t)((uint64_t)nonce >> (8 * i));
+
+        memcpy(state, H0, sizeof(state));
+        compress(state, buf, nblocks);
+
+        /* Leading hex zeros are the high nibbles of the big-endian state words */
+        int ok = 1;
+        for (int i = 0; i < difficulty; i++) {
+            if ((state[i / 8] >> (28 - 4 * (i % 8))) & 0xF) {
+                ok = 0;
+                break;
+            }
+        }
+        if (ok) {
+            for (int i = 0; i < 8; i++) {
+                out_digest[4 * i] = (uint8_t)(state[i] >> 24);
+                out_digest[4 * i + 1] = (uint8_t)(state[i] >> 16);
+                out_digest[4 * i + 2] = (uint8_t)(state[i] >> 8);
+                out_digest[4 * i + 3] = (uint8_t)state[i];
+            }
+            return nonce;
+        }
+    }
+    return -1;
+}
@@ -0,0 +1,53 @@
+"""ctypes binding for the native mining kernel in mine_range.c.
+
+Build the shared library next to this file with:
+
+    cc -O3 -march=native -shared -fPIC -o libmine_range.so mine_range.c
+
+Importing this module raises OSError when the library has not been built.
+"""
+
+import ctypes
+import os
+
+_lib = ctypes.CDLL(os.path.join(os.path.dirname(os.path.abspath(__file__)), "libmine_range.so"))
+
+_lib.sha256_midstate.argtypes = [ctypes.POINTER(ctypes.c_char), ctypes.c_size_t, ctypes.POINTER(ctypes.c_uint32)]
+_lib.sha256_midstate.restype = None
+
+_lib.mine_range.argtypes = [
+    ctypes.POINTER(ctypes.c_uint32),  # H0[8]
+    ctypes.c_char_p,                  # tail
+    ctypes.c_size_t,                  # tail_len
+    ctypes.c_uint64,                  # offset
+    ctypes.c_int,                     # difficulty
+    ctypes.c_int64,                   # n0
+    ctypes.c_int64,                   # n1
+    ctypes.c_char_p,                  # out_digest[32]
+]
+_lib.mine_range.restype = ctypes.c_int64
+
+
+def prefix_midstate(prefix):
+    """Compresses every full 64-byte block of prefix.
+
+    prefix may be any writable buffer (e.g. a memoryview of a bytearray); it
+    is passed to C without copying. Returns (midstate, tail, offset) like
+    sha256_mine.prefix_midstate.
+    """
+    midstate = (ctypes.c_uint32 * 8)()
+    data = (ctypes.c_char * len(prefix)).from_buffer(prefix)
+    _lib.sha256_midstate(data, len(prefix), midstate)
+    offset = len(prefix) - len(prefix) % 64
+    return midstate, bytes(prefix[offset:]), offset
+
+
+def mine_range(midstate, tail, offset, difficulty, n0, n1):
+    """Searches nonces in [n0, n1) in native code.
+
+    Returns (nonce, digest), with nonce = -1 when the range holds no solution.
+    The GIL is released for the duration of the call.
+    """
+    digest = ctypes.create_string_buffer(32)
+    nonce = _lib.mine_range(midstate, tail, len(tail), offset, difficulty, n0, n1, digest)
+    return nonce, digest.raw
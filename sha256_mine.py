@@ -0,0 +1,171 @@
+"""Numba-compiled SHA-256 proof-of-work kernel.
+
+hashlib cannot resume from a saved state or run without the interpreter in
+between calls, so nonces are hashed here with a SHA-256 written against
+plain integer arrays and compiled with Numba. The block prefix is
+compressed once into a midstate, and every attempt only hashes the
+remaining tail plus the nonce. Nonces are hashed in batches spread over
+all CPU cores.
+"""
+
+import threading
+
+import numpy as np
+from numba import config, get_num_threads, njit, prange
+
+# Mining runs in a worker thread; a TBB pool first started from one keeps
+# the interpreter from exiting, so TBB is only the last resort. The
+# workqueue layer is not threadsafe, which _launch_lock makes up for.
+config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+
+# Every session mines on its own thread; parallel launches take turns
+_launch_lock = threading.Lock()
+
+MASK32 = 0xFFFFFFFF
+
+# SHA-256 round constants
+K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype=np.int64)
+
+# Initial hash value H(0)
+H0 = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype=np.uint32)
+
+
+@njit(cache=True, boundscheck=False)
+def _rotr(x, n):
+    return ((x >> n) | (x << (32 - n))) & MASK32
+
+
+@njit(cache=True, boundscheck=False)
+def _compress(state, data, offset, w):
+    """Runs the 64 SHA-256 rounds over data[offset:offset + 64], updating state in place.
+
+    w is a caller-owned int64[64] scratch array for the message schedule.
+    """
+    for t in range(16):
+        i = offset + 4 * t
+        w[t] = (np.int64(data[i]) << 24) | (np.int64(data[i + 1]) << 16) | (np.int64(data[i + 2]) << 8) | np.int64(data[i + 3])
+    for t in range(16, 64):
+        s0 = _rotr(w[t - 15], 7) ^ _rotr(w[t - 15], 18) ^ (w[t - 15] >> 3)
+        s1 = _rotr(w[t - 2], 17) ^ _rotr(w[t - 2], 19) ^ (w[t - 2] >> 10)
+        w[t] = (w[t - 16] + s0 + w[t - 7] + s1) & MASK32
+
+    a = np.int64(state[0])
+    b = np.int64(state[1])
+    c = np.int64(state[2])
+    d = np.int64(state[3])
+    e = np.int64(state[4])
+    f = np.int64(state[5])
+    g = np.int64(state[6])
+    h = np.int64(state[7])
+    for t in range(64):
+        s1 = _rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)
+        ch = (e & f) ^ (~e & g & MASK32)
+        t1 = (h + s1 + ch + K[t] + w[t]) & MASK32
+        s0 = _rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)
+        maj = (a & b) ^ (a & c) ^ (b & c)
+        t2 = (s0 + maj) & MASK32
+        h = g
+        g = f
+        f = e
+        e = (d + t1) & MASK32
+        d = c
+        c = b
+        b = a
+        a = (t1 + t2) & MASK32
+
+    state[0] = (np.int64(state[0]) + a) & MASK32
+    state[1] = (np.int64(state[1]) + b) & MASK32
+    state[2] = (np.int64(state[2]) + c) & MASK32
+    state[3] = (np.int64(state[3]) + d) & MASK32
+    state[4] = (np.int64(state[4]) + e) & MASK32
+    state[5] = (np.int64(state[5]) + f) & MASK32
+    state[6] = (np.int64(state[6]) + g) & MASK32
+    state[7] = (np.int64(state[7]) + h) & MASK32
+
+
+def prefix_midstate(prefix):
+    """Compresses every full 64-byte block of prefix.
+
+    Returns (midstate, tail, offset): the SHA-256 state after those blocks,
+    the leftover bytes that still have to be hashed and the number of bytes
+    already consumed.
+    """
+    data = np.frombuffer(prefix, dtype=np.uint8)
+    state = H0.copy()
+    w = np.empty(64, dtype=np.int64)
+    offset = len(data) - len(data) % 64
+    for start in range(0, offset, 64):
+        _compress(state, data, start, w)
+    return state, data[offset:].copy(), offset
+
+
+@njit(cache=True, boundscheck=False)
+def _pad_message(tail, offset):
+    """Builds the final message blocks: tail, an 8-byte nonce slot, then SHA-256 padding.
+
+    The nonce has a fixed width, so the padding and block count are the same
+    for every nonce and only the slot at len(tail) changes.
+    """
+    msg_len = len(tail) + 8
+    # Standard padding: 0x80, zeros, then the message length in bits
+    nblocks = (msg_len + 9 + 63) // 64
+    buf = np.zeros(nblocks * 64, dtype=np.uint8)
+    buf[:len(tail)] = tail
+    buf[msg_len] = 0x80
+    bit_len = (offset + msg_len) * 8
+    for i in range(8):
+        buf[len(buf) - 1 - i] = (bit_len >> (8 * i)) & 0xFF
+    return buf
+
+
+@njit(cache=True, boundscheck=False)
+def _hash_nonce(midstate, buf, nonce_pos, nonce, state, w):
+    """Hashes the padded message in buf with the nonce filled in, leaving the result in state.
+
+    The nonce is written as 8 little-endian bytes, matching Block.calculate_hash.
+    """
+    for i in range(8):
+        buf[nonce_pos + i] = (nonce >> (8 * i)) & 0xFF
+    state[:] = midstate
+    for blk in range(len(buf) // 64):
+        _compress(state, buf, blk * 64, w)
+
+
+def hash_batch(midstate, tail, offset, start_nonce, count):
+    """Hashes the nonces start_nonce .. start_nonce + count - 1 in parallel.
+
+    Returns a (count, 32) uint8 array with one digest per row.
+    """
+    with _launch_lock:
+        return _hash_batch(midstate, tail, offset, start_nonce, count, min(count, get_num_threads()))
+
+
+@njit(cache=True, boundscheck=False, parallel=True, nogil=True)
+def _hash_batch(midstate, tail, offset, start_nonce, count, nslices):
+    # Nonces are independent, so the batch is split into one slice per
+    # thread, each with its own scratch buffers.
+    digests = np.empty((count, 32), dtype=np.uint8)
+    for s in prange(nslices):
+        buf = _pad_message(tail, offset)
+        state = np.empty(8, dtype=np.uint32)
+        w = np.empty(64, dtype=np.int64)
+        for row in range(s * count // nslices, (s + 1) * count // nslices):
+            _hash_nonce(midstate, buf, len(tail), start_nonce + row, state, w)
+            for i in range(8):
+                word = state[i]
+                digests[row, 4 * i] = (word >> 24) & 0xFF
+                digests[row, 4 * i + 1] = (word >> 16) & 0xFF
+                digests[row, 4 * i + 2] = (word >> 8) & 0xFF
+                digests[row, 4 * i + 3] = word & 0xFF
+    return digests